@@ -0,0 +1,106 @@
+# File: bench_conversations.py
+"""Benchmark conversation history reads against a large collection.
+
+Seeds a scratch database with documents in the legacy layout (monotonic float
+timestamps, no author) and in the current layout, then times the legacy global
+history query against the current prompt read path: per-user history plus the
+user and channel summaries, read concurrently as generate_chatgpt_response does.
+
+    python bench_conversations.py --documents 2000000 --users 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from conversation_store import ConversationStore
+
+load_dotenv()
+
+BATCH_SIZE = 10000
+
+
+async def seed(store: ConversationStore, documents: int, users: int) -> None:
+    legacy = store.collection.database["conversations_legacy"]
+    await legacy.drop()
+    await store.collection.drop()
+    await store.summaries.drop()
+    await legacy.create_index([('timestamp', -1)])
+    await legacy.create_index([('user', 1), ('timestamp', -1)])
+    await store.ensure_indexes()
+
+    start = datetime.now(timezone.utc) - timedelta(seconds=documents)
+    for offset in range(0, documents, BATCH_SIZE):
+        count = min(BATCH_SIZE, documents - offset)
+        legacy_batch, batch = [], []
+        for i in range(offset, offset + count):
+            author = f"user{random.randrange(users)}"
+            legacy_batch.append({'user': f"message {i}", 'bot': f"reply {i}", 'timestamp': float(i)})
+            batch.append({
+                'channel': 'bench', 'author': author, 'user': f"message {i}", 'bot': f"reply {i}",
+                'timestamp': start + timedelta(seconds=i)
+            })
+        await legacy.insert_many(legacy_batch, ordered=False)
+        await store.collection.insert_many(batch, ordered=False)
+
+    now = datetime.now(timezone.utc)
+    summaries = [{'channel': 'bench', 'author': None, 'summary': "channel summary", 'updated_at': now}]
+    summaries += [
+        {'channel': 'bench', 'author': f"user{u}", 'summary': f"summary {u}", 'updated_at': now}
+        for u in range(users)
+    ]
+    await store.summaries.insert_many(summaries, ordered=False)
+
+
+async def time_reads(label: str, read, iterations: int) -> None:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await read()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label}: p50 {p50:.2f} ms, p99 {p99:.2f} ms over {iterations} reads")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark conversation history reads")
+    parser.add_argument("--documents", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.getenv('MONGO_URI'))
+    db = client[os.getenv('BENCH_DB_NAME', 'spbot_bench')]
+    store = ConversationStore(db, ttl_days=0)
+    legacy = db["conversations_legacy"]
+
+    if not args.skip_seed:
+        print(f"Seeding {args.documents} documents for {args.users} users...")
+        await seed(store, args.documents, args.users)
+
+    async def legacy_read():
+        cursor = legacy.find().sort('timestamp', -1).limit(5)
+        await cursor.to_list(length=5)
+
+    async def history_read():
+        author = f"user{random.randrange(args.users)}"
+        await asyncio.gather(
+            store.get_history('bench', author),
+            store.get_summary('bench', author),
+            store.get_summary('bench', None)
+        )
+
+    await time_reads("before (global history)", legacy_read, args.iterations)
+    await time_reads("after (history + summaries)", history_read, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
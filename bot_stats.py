@@ -0,0 +1,47 @@
+# File: bot_stats.py
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class BotStats:
+    """In-memory runtime counters for the operator console."""
+    def __init__(self, window: float = 60.0, max_samples: int = 500):
+        self.window = window
+        self.started_at = time.monotonic()
+        self.messages_total = 0
+        self.replies_total = 0
+        self._message_times: Deque[float] = deque()
+        self._reply_latencies: Deque[float] = deque(maxlen=max_samples)
+        # name -> (healthy, monotonic time of last check, detail)
+        self.dependencies: Dict[str, Tuple[bool, float, str]] = {}
+
+    def record_message(self) -> None:
+        now = time.monotonic()
+        self.messages_total += 1
+        self._message_times.append(now)
+        self._trim(now)
+
+    def record_reply(self, latency: float) -> None:
+        self.replies_total += 1
+        self._reply_latencies.append(latency)
+
+    def record_dependency(self, name: str, healthy: bool, detail: str = "") -> None:
+        self.dependencies[name] = (healthy, time.monotonic(), detail)
+
+    def throughput(self) -> float:
+        """Chat messages per minute over the sliding window."""
+        now = time.monotonic()
+        self._trim(now)
+        return len(self._message_times) * 60.0 / self.window
+
+    def latency_percentiles(self, percentiles: Tuple[int, ...] = (50, 90, 99)) -> Dict[int, Optional[float]]:
+        """Reply latency percentiles in seconds over the most recent replies."""
+        latencies: List[float] = sorted(self._reply_latencies)
+        if not latencies:
+            return {p: None for p in percentiles}
+        return {p: latencies[min(len(latencies) - 1, len(latencies) * p // 100)] for p in percentiles}
+
+    def _trim(self, now: float) -> None:
+        while self._message_times and now - self._message_times[0] > self.window:
+            self._message_times.popleft()
@@ -0,0 +1,173 @@
+# File: conversation_store.py
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import OperationFailure
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+Summarizer = Callable[[Optional[str], List[Dict[str, Any]]], Awaitable[str]]
+
+# Exchanges per summarize call, keeping the prompt well inside the model's context
+COMPACTION_BATCH_SIZE = 50
+# Most recent channel-level (legacy) exchanges rolled into the channel summary;
+# older ones are dropped without summarizing
+CHANNEL_SUMMARY_LIMIT = 500
+
+
+class ConversationStore:
+    """Conversation history with retention, per-user summaries and scoped clears.
+
+    Exchanges are stored with wall-clock timestamps so ordering survives restarts.
+    A TTL index expires raw exchanges after ttl_days (0 keeps them forever), and
+    compact() rolls everything older than the newest keep_per_user exchanges of a
+    user into that user's summary. Channel and author names are matched
+    case-insensitively; an author of None holds channel-level history.
+    """
+    def __init__(self, db: Any, ttl_days: int = 30, keep_per_user: int = 20):
+        self.collection = db["conversations"]
+        self.summaries = db["conversation_summaries"]
+        self.ttl_days = ttl_days
+        self.keep_per_user = keep_per_user
+
+    async def ensure_indexes(self) -> None:
+        ttl_options = {'expireAfterSeconds': self.ttl_days * 86400} if self.ttl_days > 0 else {}
+        await self._create_index(self.collection, [('timestamp', -1)], ttl_options)
+        await self._create_index(self.summaries, [('updated_at', -1)], ttl_options)
+        await self.collection.create_index([('channel', 1), ('author', 1), ('timestamp', -1)])
+        await self.summaries.create_index([('channel', 1), ('author', 1)], unique=True)
+        # Superseded: 'user' holds message text, so this index never served a query
+        try:
+            await self.collection.drop_index('user_1_timestamp_-1')
+        except OperationFailure:
+            pass
+        logger.info("Indexes created on conversation collections.")
+
+    async def _create_index(self, collection: Any, keys: List, options: Dict[str, Any]) -> None:
+        try:
+            await collection.create_index(keys, **options)
+        except OperationFailure as e:
+            # The retention setting changed since the index was built; rebuild it
+            logger.info(f"Rebuilding index {keys} on {collection.name}: {e}")
+            await collection.drop_index(keys)
+            await collection.create_index(keys, **options)
+
+    @staticmethod
+    def _scope(channel: str, author: Optional[str]) -> Dict[str, Any]:
+        return {'channel': channel.lower(), 'author': author.lower() if author else None}
+
+    async def migrate_legacy(self, channel: str) -> int:
+        """Backfill exchanges saved before channels, authors and wall-clock timestamps.
+
+        Legacy exchanges get their insertion time (from the ObjectId) as timestamp
+        and become channel-level history, which compact() rolls into the channel
+        summary. Legacy timestamps are numbers, so the timestamp index makes this
+        a cheap no-op once migrated.
+        """
+        scope = self._scope(channel, None)
+        result = await self.collection.update_many(
+            {'timestamp': {'$type': 'number'}},
+            [{'$set': {'timestamp': {'$toDate': '$_id'}, 'channel': scope['channel'], 'author': None}}]
+        )
+        if result.modified_count:
+            logger.info(f"Migrated {result.modified_count} legacy exchanges to channel history for {channel}")
+        return result.modified_count
+
+    async def save(self, channel: str, author: str, user_message: str, bot_response: str) -> None:
+        await self.collection.insert_one({
+            **self._scope(channel, author),
+            'user': user_message,
+            'bot': bot_response,
+            'timestamp': datetime.now(timezone.utc)
+        })
+
+    async def get_history(self, channel: str, author: str, limit: int = 5) -> List[Dict[str, Any]]:
+        cursor = self.collection.find(
+            self._scope(channel, author),
+            {'user': 1, 'bot': 1, '_id': 0}
+        ).sort('timestamp', -1).limit(limit)
+        history = await cursor.to_list(length=limit)
+        return list(reversed(history))
+
+    async def get_summary(self, channel: str, author: Optional[str]) -> Optional[str]:
+        doc = await self.summaries.find_one(self._scope(channel, author), {'summary': 1})
+        return doc['summary'] if doc else None
+
+    async def clear(self, channel: str, author: Optional[str] = None) -> int:
+        """Delete exchanges and summaries for a channel, or for one user in it."""
+        query = self._scope(channel, author)
+        if author is None:
+            del query['author']
+        result = await self.collection.delete_many(query)
+        await self.summaries.delete_many(query)
+        return result.deleted_count
+
+    def _retained(self) -> Dict[str, Any]:
+        """Filter for exchanges the TTL index has not expired yet."""
+        if self.ttl_days <= 0:
+            return {}
+        return {'timestamp': {'$gte': datetime.now(timezone.utc) - timedelta(days=self.ttl_days)}}
+
+    async def compact(self, summarize: Summarizer) -> int:
+        """Roll exchanges beyond keep_per_user into per-user summaries.
+
+        Only exchanges inside the retention window are considered; expired ones
+        are left to the TTL index. Channel-level history is rolled up entirely,
+        capped at its newest CHANNEL_SUMMARY_LIMIT exchanges. Exchanges are
+        summarized oldest first in batches of COMPACTION_BATCH_SIZE and only
+        deleted once their summary has been written, so a failed summarization
+        retains them. Returns the number of exchanges compacted.
+        """
+        compacted = 0
+        retained = self._retained()
+        pipeline = [
+            {'$match': retained},
+            {'$group': {'_id': {'channel': '$channel', 'author': '$author'}, 'count': {'$sum': 1}}},
+            {'$match': {'$or': [{'_id.author': None}, {'count': {'$gt': self.keep_per_user}}]}}
+        ]
+        # Materialize the groups so no cursor idles through slow summarize calls
+        groups = await self.collection.aggregate(pipeline).to_list(length=None)
+        for group in groups:
+            scope = {'channel': group['_id']['channel'], 'author': group['_id']['author']}
+            query = {**scope, **retained}
+            if scope['author'] is None:
+                keep = 0
+                if group['count'] > CHANNEL_SUMMARY_LIMIT:
+                    await self._drop_oldest(query, group['count'] - CHANNEL_SUMMARY_LIMIT)
+                    group['count'] = CHANNEL_SUMMARY_LIMIT
+            else:
+                keep = self.keep_per_user
+            excess = group['count'] - keep
+            while excess > 0:
+                batch_size = min(COMPACTION_BATCH_SIZE, excess)
+                cursor = self.collection.find(query, {'user': 1, 'bot': 1}).sort('timestamp', 1).limit(batch_size)
+                batch = await cursor.to_list(length=batch_size)
+                if not batch:
+                    break
+                try:
+                    previous = await self.summaries.find_one(scope, {'summary': 1})
+                    summary = await summarize(previous['summary'] if previous else None, batch)
+                except Exception as e:
+                    logger.error(f"Error summarizing conversations for {scope['author']} in {scope['channel']}: {e}")
+                    break
+                await self.summaries.update_one(
+                    scope,
+                    {'$set': {'summary': summary, 'updated_at': datetime.now(timezone.utc)},
+                     '$inc': {'exchanges': len(batch)}},
+                    upsert=True
+                )
+                await self.collection.delete_many({'_id': {'$in': [doc['_id'] for doc in batch]}})
+                compacted += len(batch)
+                excess -= len(batch)
+        return compacted
+
+    async def _drop_oldest(self, query: Dict[str, Any], count: int) -> None:
+        cursor = self.collection.find(query, {'timestamp': 1}).sort('timestamp', 1).skip(count - 1).limit(1)
+        boundary = await cursor.to_list(length=1)
+        if boundary:
+            result = await self.collection.delete_many(
+                {**query, 'timestamp': {**query.get('timestamp', {}), '$lte': boundary[0]['timestamp']}}
+            )
+            logger.info(f"Dropped {result.deleted_count} channel-level exchanges beyond the summary limit")
@@ -0,0 +1,272 @@
+# File: flight_recorder.py
+import asyncio
+import bisect
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+# File layout: one fixed-size header followed by fixed-width little-endian samples.
+# Header: magic, format version, sample size, recording start (unix time)
+HEADER_FORMAT = '<4sHHd'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b'FLTR'
+VERSION = 1
+
+# Sample: seconds since start, lat, lon, indicated altitude, ground speed,
+# vertical speed, heading, on-ground flag
+SAMPLE_FORMAT = '<dddffffB'
+SAMPLE_SIZE = struct.calcsize(SAMPLE_FORMAT)
+
+FILE_EXTENSION = '.flr'
+EARTH_RADIUS_NM = 3440.065
+ON_GROUND_AGL_FEET = 10.0
+
+
+def _is_on_ground(sim_info: Dict[str, Any]) -> bool:
+    """Best-effort on-ground detection from a LittleNavMap sim info response."""
+    if 'on_ground' in sim_info:
+        return bool(sim_info['on_ground'])
+    altitude_above_ground = sim_info.get('altitude_above_ground')
+    if altitude_above_ground is not None:
+        return altitude_above_ground < ON_GROUND_AGL_FEET
+    return False
+
+
+def _haversine_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in nautical miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(math.sqrt(a))
+
+
+class FlightRecorder:
+    """Appends sim info samples to a binary recording, one file per flight."""
+    def __init__(self, directory: str = 'recordings', max_gap: float = 300.0, flush_every: int = 30):
+        self.directory = directory
+        self.max_gap = max_gap
+        self.flush_every = flush_every
+        self.current_path: Optional[str] = None
+        self._file = None
+        self._start_time = 0.0
+        self._last_time = 0.0
+        self._pending = 0
+        self._packer = struct.Struct(SAMPLE_FORMAT)
+
+    def record(self, sim_info: Optional[Dict[str, Any]], now: Optional[float] = None) -> None:
+        """Record one sample. An inactive sim or a long gap ends the current flight.
+
+        A missing response (failed poll) is skipped; only a gap longer than
+        max_gap splits the flight.
+        """
+        now = time.time() if now is None else now
+        if sim_info is None:
+            return
+        if not sim_info.get('active', False):
+            self.end_flight()
+            return
+        if self._file is not None and now - self._last_time > self.max_gap:
+            self.end_flight()
+        if self._file is None:
+            self.start_flight(now)
+
+        position = sim_info.get('position') or {}
+        self._file.write(self._packer.pack(
+            now - self._start_time,
+            position.get('lat', 0.0),
+            position.get('lon', 0.0),
+            sim_info.get('indicated_altitude', 0.0),
+            sim_info.get('ground_speed', 0.0),
+            sim_info.get('vertical_speed', 0.0),
+            sim_info.get('heading', 0.0),
+            _is_on_ground(sim_info)
+        ))
+        self._last_time = now
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def start_flight(self, now: Optional[float] = None) -> str:
+        """Close any open recording and start a new one."""
+        self.end_flight()
+        now = time.time() if now is None else now
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, datetime.fromtimestamp(now).strftime('flight_%Y%m%d_%H%M%S'))
+        suffix = 0
+        while True:
+            self.current_path = stem + (f"_{suffix}" if suffix else "") + FILE_EXTENSION
+            try:
+                self._file = open(self.current_path, 'xb')
+                break
+            except FileExistsError:
+                suffix += 1
+        self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, SAMPLE_SIZE, now))
+        self._start_time = now
+        self._last_time = now
+        self._pending = 0
+        logger.info(f"Started flight recording: {self.current_path}")
+        return self.current_path
+
+    def end_flight(self) -> None:
+        """Flush and close the current recording, if any."""
+        if self._file is None:
+            return
+        self._file.close()
+        logger.info(f"Finished flight recording: {self.current_path}")
+        self._file = None
+        self._pending = 0
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            self._pending = 0
+
+    def list_recordings(self) -> List[str]:
+        """All recordings in the directory, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(FILE_EXTENSION)
+        )
+
+    def latest_recording(self) -> Optional[str]:
+        recordings = self.list_recordings()
+        return recordings[-1] if recordings else None
+
+
+class FlightRecording:
+    """Read-only, memory-mapped view of a recording for aggregate queries."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty flight recording: {path}")
+        if len(self._mmap) < HEADER_SIZE:
+            self.close()
+            raise ValueError(f"Truncated flight recording: {path}")
+        magic, version, sample_size, self.start_time = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != MAGIC or version != VERSION or sample_size != SAMPLE_SIZE:
+            self.close()
+            raise ValueError(f"Unsupported flight recording format: {path}")
+        # Ignore a trailing partial sample left behind by an interrupted write
+        self.sample_count = (len(self._mmap) - HEADER_SIZE) // SAMPLE_SIZE
+        self._samples = memoryview(self._mmap)[HEADER_SIZE:HEADER_SIZE + self.sample_count * SAMPLE_SIZE]
+
+    def __enter__(self) -> 'FlightRecording':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.sample_count
+
+    def close(self) -> None:
+        if getattr(self, '_samples', None) is not None:
+            self._samples.release()
+            self._samples = None
+        self._mmap.close()
+        self._file.close()
+
+    def samples(self) -> Iterator[Tuple[float, float, float, float, float, float, float, int]]:
+        return struct.iter_unpack(SAMPLE_FORMAT, self._samples)
+
+    def duration(self) -> float:
+        if not self.sample_count:
+            return 0.0
+        return struct.unpack_from(SAMPLE_FORMAT, self._samples, (self.sample_count - 1) * SAMPLE_SIZE)[0]
+
+    def summary(self) -> Dict[str, Any]:
+        """Total distance (nm), max altitude (ft) and vertical speed at the last touchdown."""
+        total_distance = 0.0
+        max_altitude = None
+        landing_vertical_speed = None
+        prev = None
+        for sample in self.samples():
+            _, lat, lon, altitude, _, _, _, on_ground = sample
+            if max_altitude is None or altitude > max_altitude:
+                max_altitude = altitude
+            if prev is not None:
+                total_distance += _haversine_nm(prev[1], prev[2], lat, lon)
+                if on_ground and not prev[7]:
+                    # Touchdown: the last airborne sample carries the descent rate
+                    landing_vertical_speed = prev[5]
+            prev = sample
+        return {
+            'samples': self.sample_count,
+            'duration': self.duration(),
+            'total_distance': total_distance,
+            'max_altitude': max_altitude,
+            'landing_vertical_speed': landing_vertical_speed
+        }
+
+
+class ReplayClient:
+    """Drop-in for LittleNavmapClient that serves sim info from a recording.
+
+    With speed > 0, samples follow the recording's timeline scaled by speed.
+    With speed <= 0, every call returns the next sample as fast as it is polled.
+    """
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        with FlightRecording(path) as recording:
+            self._samples = list(recording.samples())
+        self._times = [sample[0] for sample in self._samples]
+        self._index = 0
+        self._started_at: Optional[float] = None
+        logger.info(f"Replaying {len(self._samples)} samples from {path} at speed {speed}")
+
+    async def get_airport_info(self, ident: str):
+        return None
+
+    async def close(self):
+        pass
+
+    async def get_sim_info(self):
+        sample = self._next_sample()
+        if sample is None:
+            return None
+        _, lat, lon, altitude, ground_speed, vertical_speed, heading, on_ground = sample
+        return {
+            'active': True,
+            'simconnect_status': 'Replay',
+            'position': {'lat': lat, 'lon': lon},
+            'indicated_altitude': altitude,
+            'ground_speed': ground_speed,
+            'vertical_speed': vertical_speed,
+            'heading': heading,
+            'on_ground': bool(on_ground)
+        }
+
+    def _elapsed(self) -> float:
+        return (asyncio.get_event_loop().time() - self._started_at) * self.speed
+
+    def _next_sample(self):
+        if self.speed <= 0:
+            if self._index >= len(self._samples):
+                return None
+            self._index += 1
+            return self._samples[self._index - 1]
+
+        if self._started_at is None:
+            self._started_at = asyncio.get_event_loop().time()
+        elapsed = self._elapsed()
+        if not self._times or elapsed > self._times[-1]:
+            return None
+        index = max(bisect.bisect_right(self._times, elapsed) - 1, 0)
+        return self._samples[index]
@@ -5,6 +5,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 import queue
 import sys
+import time
 from typing import List, Optional, Dict, Any
 from cachetools import TTLCache
 
@@ -19,6 +20,11 @@ from openai import RateLimitError, APIError, APIConnectionError
 import speech_recognition as sr
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from bot_stats import BotStats
+from conversation_store import ConversationStore
+from flight_recorder import FlightRecorder, FlightRecording, ReplayClient
+from operator_console import OperatorConsole
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -41,27 +47,43 @@ OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-0613')
 MONGO_URI = os.getenv('MONGO_URI')
 MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
 
+# Conversation retention configuration
+CONVERSATION_TTL_DAYS = int(os.getenv('CONVERSATION_TTL_DAYS', 30))
+CONVERSATION_KEEP_PER_USER = int(os.getenv('CONVERSATION_KEEP_PER_USER', 20))
+CONVERSATION_COMPACTION_INTERVAL = int(os.getenv('CONVERSATION_COMPACTION_INTERVAL', 3600))
+
+# Flight recorder configuration
+FLIGHT_RECORDER_DIR = os.getenv('FLIGHT_RECORDER_DIR', 'recordings')
+FLIGHT_RECORDER_INTERVAL = float(os.getenv('FLIGHT_RECORDER_INTERVAL', 1.0))
+
 # Cache for flight data
 flight_data_cache = TTLCache(maxsize=100, ttl=60)
 
 def setup_logging(log_file='bot.log', console_level=logging.DEBUG, file_level=logging.DEBUG):
+    """Log to stdout and a rotating file. console_level=None logs to the file only."""
     logger = logging.getLogger('spbot')
     logger.setLevel(logging.DEBUG)
 
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(console_level)
-    console_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
-
     # File handler
     file_handler = RotatingFileHandler(log_file, maxBytes=10000, backupCount=3)
     file_handler.setLevel(file_level)
     file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_formatter)
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    if console_level is not None:
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(console_level)
+        console_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        console_handler.setFormatter(console_formatter)
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+    else:
+        # Keep the terminal free for the operator console; module loggers
+        # propagate to the root logger, so send everything to the file there
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        root.addHandler(file_handler)
 
     return logger
 
@@ -85,17 +107,18 @@ class AlertManager:
             del self.alerts[name]
 
 class LittleNavmapClient:
-    def __init__(self, base_url: str = "http://localhost:8965/api"):
+    def __init__(self, base_url: str = "http://localhost:8965/api", console_logging: bool = True):
         self.base_url = base_url
         self.logger = logging.getLogger('LittleNavmapClient')
         handler = logging.StreamHandler(sys.stdout)
         handler.setLevel(logging.DEBUG)
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
-        if not self.logger.handlers:
+        if console_logging and not self.logger.handlers:
             self.logger.addHandler(handler)
-        self.logger.setLevel(logging.DEBUG)
-        self.logger.debug("LittleNavmapClient initialized with base_url: %s", self.base_url)
+        self.logger.setLevel(logging.INFO)
+        self.logger.info("LittleNavmapClient initialized with base_url: %s", self.base_url)
+        self._session: Optional[aiohttp.ClientSession] = None
 
     async def get_airport_info(self, ident: str):
         return await self._get_data(f'/airport/info?ident={ident}')
@@ -103,28 +126,27 @@ class LittleNavmapClient:
     async def get_sim_info(self):
         return await self._get_data('/sim/info')
 
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def _get_data(self, endpoint: str):
-        self.logger.debug(f"Attempting to retrieve data from endpoint: {endpoint}")
         url = f"{self.base_url}{endpoint}"
-        self.logger.debug(f"Full URL: {url}")
-        headers = {
-            'User-Agent': 'TwitchBot/1.0',
-            'Accept': 'application/json'
-        }
+        if self._session is None or self._session.closed:
+            # One session for the client's lifetime; the sim is polled every second
+            self._session = aiohttp.ClientSession(headers={
+                'User-Agent': 'TwitchBot/1.0',
+                'Accept': 'application/json'
+            })
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    self.logger.debug(f"Response status: {response.status}")
-                    self.logger.debug(f"Response headers: {response.headers}")
-                    content = await response.text()
-                    self.logger.debug(f"Response content: {content}")
-                    if response.status == 200:
-                        data = await response.json()
-                        self.logger.info(f"Successfully retrieved data from {endpoint}")
-                        return data
-                    else:
-                        self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}")
-                        return None
+            async with self._session.get(url) as response:
+                self.logger.debug(f"GET {url} -> {response.status}")
+                if response.status == 200:
+                    return await response.json()
+                content = await response.text()
+                self.logger.error(f"Failed to retrieve data from {endpoint}. Status code: {response.status}. Content: {content}")
+                return None
         except aiohttp.ClientError as e:
             self.logger.error(f"Connection error while accessing {url}: {str(e)}")
         except Exception as e:
@@ -132,7 +154,8 @@ class LittleNavmapClient:
         return None
 
 class Bot(commands.Bot):
-    def __init__(self, openai_client_instance: AsyncOpenAI, cli_mode: bool = False):
+    def __init__(self, openai_client_instance: AsyncOpenAI, cli_mode: bool = False,
+                 littlenavmap_client: Optional[Any] = None, record_flights: bool = True):
         super().__init__(token=BOT_TOKEN, prefix="!", initial_channels=[CHANNEL_NAME])
         self.loop = asyncio.get_event_loop()
         self.openai_client: AsyncOpenAI = openai_client_instance
@@ -147,12 +170,13 @@ class Bot(commands.Bot):
         self.verbose: bool = False
         self.cli_mode: bool = cli_mode
 
-        self.logger = setup_logging()
+        self.logger = setup_logging(console_level=None if cli_mode else logging.DEBUG)
         self.logger.info("Bot instance created")
 
         self.voice_command_queue: queue.Queue[str] = queue.Queue()
 
         self.alert_manager = AlertManager()
+        self.stats = BotStats()
 
         self.tts_voice = "default"
         self.tts_speed = 1.2
@@ -160,23 +184,39 @@ class Bot(commands.Bot):
 
         self.mongo_client = AsyncIOMotorClient(MONGO_URI, io_loop=self.loop)
         self.db = self.mongo_client[MONGO_DB_NAME]
-        self.conversation_collection = self.db["conversations"]
+        self.conversation_store = ConversationStore(
+            self.db, ttl_days=CONVERSATION_TTL_DAYS, keep_per_user=CONVERSATION_KEEP_PER_USER
+        )
 
-        self.littlenavmap_client = LittleNavmapClient()
+        self.littlenavmap_client = littlenavmap_client or LittleNavmapClient(console_logging=not cli_mode)
+        self.flight_recorder = FlightRecorder(FLIGHT_RECORDER_DIR)
+        self.record_flights: bool = record_flights
+        self.last_sim_info: Optional[Dict[str, Any]] = None
 
         self.loop.run_until_complete(self.ensure_indexes())
 
     async def ensure_indexes(self):
-        await self.conversation_collection.create_index([('timestamp', -1)])
-        await self.conversation_collection.create_index([('user', 1), ('timestamp', -1)])
+        await self.conversation_store.ensure_indexes()
+        await self.conversation_store.migrate_legacy(CHANNEL_NAME)
         self.logger.info("Indexes created on conversation collection.")
 
+    async def periodic_conversation_compaction(self):
+        while True:
+            try:
+                compacted = await self.conversation_store.compact(self.summarize_conversation)
+                if compacted:
+                    self.logger.info(f"Compacted {compacted} conversation entries into summaries")
+            except Exception as e:
+                self.logger.error(f"Error during conversation compaction: {e}")
+            await asyncio.sleep(CONVERSATION_COMPACTION_INTERVAL)
+
     async def periodic_flight_info_update(self):
         last_altitude = None
         last_position = None
         while True:
             try:
-                sim_info = await self.littlenavmap_client.get_sim_info()
+                # Reuse the telemetry loop's latest sample instead of polling the sim again
+                sim_info = self.last_sim_info
                 if sim_info:
                     current_altitude = sim_info.get('indicated_altitude')
                     current_position = sim_info.get('position')
@@ -199,9 +239,21 @@ class Bot(commands.Bot):
                 self.logger.error(f"Error during periodic flight info update: {e}")
             await asyncio.sleep(60)
 
+    async def record_flight_telemetry(self):
+        while True:
+            try:
+                sim_info = await self.littlenavmap_client.get_sim_info()
+                self.last_sim_info = sim_info
+                self.stats.record_dependency('littlenavmap', sim_info is not None)
+                if self.record_flights:
+                    self.flight_recorder.record(sim_info)
+            except Exception as e:
+                self.logger.error(f"Error recording flight telemetry: {e}")
+            await asyncio.sleep(FLIGHT_RECORDER_INTERVAL)
+
     @commands.command(name='flightstatus')
     async def flight_status_command(self, ctx):
-        sim_info = await self.littlenavmap_client.get_sim_info()
+        sim_info = self.last_sim_info
         if sim_info:
             altitude = round(sim_info.get('indicated_altitude', 0), 2)
             ground_speed = round(sim_info.get('ground_speed', 0) * 3600, 2)  # Convert to km/h
@@ -222,6 +274,36 @@ class Bot(commands.Bot):
         else:
             await ctx.send("I am unable to retrieve flight data at this time. Patience, minion.")
 
+    @commands.command(name='stats')
+    async def flight_stats_command(self, ctx):
+        self.flight_recorder.flush()
+        path = self.flight_recorder.latest_recording()
+        if path is None:
+            await ctx.send("No flights have been recorded yet. Fly first, minion.")
+            return
+        try:
+            with FlightRecording(path) as recording:
+                stats = recording.summary()
+        except ValueError as e:
+            self.logger.error(f"Unable to read flight recording {path}: {e}")
+            await ctx.send("The flight recorder is unreadable. Patience, minion.")
+            return
+        if not stats['samples']:
+            await ctx.send("The current flight has no data yet. Patience, minion.")
+            return
+
+        minutes = round(stats['duration'] / 60)
+        distance = round(stats['total_distance'], 1)
+        max_altitude = round(stats['max_altitude'])
+        landing = stats['landing_vertical_speed']
+        landing_text = f"{round(landing)} ft/min" if landing is not None else "not yet landed"
+        stats_message = (
+            f"Flight stats: {minutes} minutes, {distance} nm flown, "
+            f"max altitude {max_altitude} feet, landing rate {landing_text}. Obey."
+        )
+        await ctx.send(stats_message)
+        await self.send_to_speaker_bot(stats_message)
+
     @commands.command(name='airport')
     async def airport_info_command(self, ctx, ident: str):
         airport_info = await self.littlenavmap_client.get_airport_info(ident)
@@ -236,36 +318,40 @@ class Bot(commands.Bot):
             await ctx.send(f"No information available for airport {ident}. Obey.")
 
     async def cli_interface(self):
-        while True:
-            command = input("Enter command (status/toggle/quit): ").strip().lower()
-            if command == "status":
-                self.logger.info(f"Bot status: {'active' if self.bot_active else 'inactive'}")
-                self.logger.info(f"Verbose mode: {'enabled' if self.verbose else 'disabled'}")
-            elif command == "toggle":
-                self.bot_active = not self.bot_active
-                self.logger.info(f"Bot {'activated' if self.bot_active else 'deactivated'}")
-            elif command == "quit":
-                self.logger.info("Shutting down bot...")
-                break
-            else:
-                self.logger.info("Invalid command. Available commands: status, toggle, quit")
+        await OperatorConsole(self, CHANNEL_NAME).run()
+
+    def twitch_connected(self) -> bool:
+        connection = getattr(self, '_connection', None)
+        return bool(connection is not None and connection.is_alive)
+
+    async def shutdown(self) -> None:
+        self.bot_active = False
+        # Bot.run() closes the Twitch connection once the loop stops
+        self.loop.stop()
 
     async def handle_bot_mention(self, message: Any) -> None:
         self.logger.info(f"Handling bot mention: {message.content}")
         self.logger.debug(f"Bot trigger words: {self.bot_trigger_words}")
+        started = time.monotonic()
         try:
-            response = await self.generate_chatgpt_response(message.content)
+            response = await self.generate_chatgpt_response(
+                message.content, channel=message.channel.name, author=message.author.name
+            )
             self.logger.debug(f"Generated response: {response}")
             if self.speaker_bot_ws and self.speaker_bot_ws.open:
                 await self.send_to_speaker_bot(response)
             else:
                 self.logger.warning("Speaker.bot connection is not available. Skipping TTS.")
             await message.channel.send(response)
+            self.stats.record_reply(time.monotonic() - started)
         except Exception as e:
             self.logger.error(f"Error handling bot mention: {e}", exc_info=True)
             await message.channel.send("I'm sorry, I encountered an error while processing your request. Please try again later.")
 
     async def update_tts_settings(self) -> None:
+        if not (self.speaker_bot_ws and self.speaker_bot_ws.open):
+            self.logger.warning("Speaker.bot connection is not available. TTS settings saved locally.")
+            return
         command = {
             'command': 'UpdateTTSSettings',
             'voice': self.tts_voice,
@@ -306,18 +392,25 @@ class Bot(commands.Bot):
     async def process_voice_command(self, command: str) -> None:
         self.logger.info(f"Processing voice command: {command}")
         if any(word in command.lower() for word in self.bot_trigger_words):
-            response = await self.generate_chatgpt_response(command)
+            started = time.monotonic()
+            response = await self.generate_chatgpt_response(
+                command, channel=CHANNEL_NAME, author=CHANNEL_NAME
+            )
             await self.send_to_speaker_bot(response)
+            self.stats.record_reply(time.monotonic() - started)
             self.logger.info(f"Voice command response: {response}")
         else:
             self.logger.debug(f"Ignoring voice command: {command}")
 
     async def event_ready(self) -> None:
         self.logger.info('Bot is ready. Logged in as | %s', self.nick)
+        self.stats.record_dependency('twitch', True)
         try:
             await self.connect_to_speaker_bot()
             self.loop.create_task(self.listen_for_voice_commands())
+            self.loop.create_task(self.record_flight_telemetry())
             self.loop.create_task(self.periodic_flight_info_update())
+            self.loop.create_task(self.periodic_conversation_compaction())
             
             sim_info = await self.littlenavmap_client.get_sim_info()
             if sim_info:
@@ -355,6 +448,7 @@ class Bot(commands.Bot):
         self.logger.error("Failed to connect to Speaker.bot after multiple attempts.")
 
     async def event_message(self, message) -> None:
+        self.stats.record_message()
         try:
             content = message.content.lower()
 
@@ -391,6 +485,7 @@ class Bot(commands.Bot):
                 'alert': self.handle_alert,
                 'say': self.handle_say_command,
                 'flightstatus': self.flight_status_command,
+                'stats': self.flight_stats_command,
                 'airport': self.airport_info_command
             }
 
@@ -439,13 +534,27 @@ class Bot(commands.Bot):
                 return f"Alert {args[0]} not found."
         return "No alert specified."
 
-    async def generate_chatgpt_response(self, message: str) -> str:
+    async def generate_chatgpt_response(self, message: str, channel: str, author: str) -> str:
         try:
             self.logger.info(f"Generating ChatGPT response for: {message}")
             
-            history = await self.get_conversation_history()
+            history, summary, channel_summary = await asyncio.gather(
+                self.conversation_store.get_history(channel, author),
+                self.conversation_store.get_summary(channel, author),
+                self.conversation_store.get_summary(channel, None)
+            )
             
             messages = [{"role": "system", "content": self.bot_personality}]
+            if channel_summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of earlier conversations in this channel: {channel_summary}"
+                })
+            if summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of your earlier conversations with {author}: {summary}"
+                })
             for entry in history:
                 messages.append({"role": "user", "content": entry['user']})
                 messages.append({"role": "assistant", "content": entry['bot']})
@@ -457,14 +566,19 @@ class Bot(commands.Bot):
             
             self.logger.info(f"Using max_tokens: {max_tokens}")
 
-            response: ChatCompletion = await self.openai_client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=messages,
-                max_tokens=max_tokens
-            )
+            try:
+                response: ChatCompletion = await self.openai_client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    max_tokens=max_tokens
+                )
+            except (RateLimitError, APIError, APIConnectionError) as e:
+                self.stats.record_dependency('openai', False, type(e).__name__)
+                raise
+            self.stats.record_dependency('openai', True)
             bot_response = response.choices[0].message.content.strip()
 
-            await self.save_conversation(message, bot_response)
+            await self.conversation_store.save(channel, author, message, bot_response)
 
             self.logger.info(f"Generated ChatGPT response: {bot_response}")
             return bot_response
@@ -472,17 +586,22 @@ class Bot(commands.Bot):
             self.logger.error(f"Error generating ChatGPT response: {e}", exc_info=True)
             return "I'm sorry, I encountered an error while processing your request. Please try again later."
 
-    async def get_conversation_history(self) -> List[Dict[str, str]]:
-        cursor = self.conversation_collection.find().sort('timestamp', -1).limit(5)
-        history = await cursor.to_list(length=5)
-        return list(reversed(history))
-
-    async def save_conversation(self, user_message: str, bot_response: str) -> None:
-        await self.conversation_collection.insert_one({
-            'user': user_message,
-            'bot': bot_response,
-            'timestamp': asyncio.get_event_loop().time()
-        })
+    async def summarize_conversation(self, previous_summary: Optional[str], exchanges: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"User: {entry['user']}\nBot: {entry['bot']}" for entry in exchanges)
+        if previous_summary:
+            transcript = f"Existing summary: {previous_summary}\n{transcript}"
+        response: ChatCompletion = await self.openai_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": (
+                    "Summarize this Twitch chat user's conversation with the bot in a few sentences. "
+                    "Keep facts about the user, their interests and running jokes."
+                )},
+                {"role": "user", "content": transcript}
+            ],
+            max_tokens=200
+        )
+        return response.choices[0].message.content.strip()
 
     async def send_to_speaker_bot(self, text: str) -> None:
         if self.speaker_bot_ws is None:
@@ -511,6 +630,10 @@ class Bot(commands.Bot):
             self.logger.error("WebSocket error: %s", e)
             raise
 
+    async def close(self):
+        await self.littlenavmap_client.close()
+        await super().close()
+
     async def event_error(self, error: Exception, data: Optional[Dict[str, Any]] = None) -> None:
         self.logger.error("An error occurred: %s", error)
         if isinstance(error, (commands.errors.CommandNotFound, commands.errors.CheckFailure)):
@@ -528,8 +651,11 @@ class Bot(commands.Bot):
             status = "active" if self.bot_active else "inactive"
             await message.channel.send(f"Bot is currently {status}.")
         elif message.content.startswith('!botclear'):
-            await self.conversation_collection.delete_many({})
-            await message.channel.send("Conversation history cleared.")
+            parts = message.content.split()
+            author = parts[1].lstrip('@') if len(parts) > 1 else None
+            deleted = await self.conversation_store.clear(message.channel.name, author)
+            scope = f"for {author}" if author else "for this channel"
+            await message.channel.send(f"Conversation history cleared {scope} ({deleted} entries).")
         elif message.content.startswith('!botpersonality'):
             _, personality = message.content.split(' ', 1)
             self.bot_personality = personality
@@ -567,21 +693,24 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Twitch Bot with AI integration")
-    parser.add_argument("--cli", action="store_true", help="Run in CLI mode")
+    parser.add_argument("--cli", action="store_true", help="Run with the operator console on stdin")
+    parser.add_argument("--replay", metavar="RECORDING", help="Replay a flight recording instead of polling LittleNavMap")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Replay speed multiplier (0 = one sample per poll, as fast as possible)")
     args = parser.parse_args()
 
     openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-    bot = Bot(openai_client, cli_mode=args.cli)
+    littlenavmap_client = ReplayClient(args.replay, speed=args.replay_speed) if args.replay else None
+    bot = Bot(openai_client, cli_mode=args.cli,
+              littlenavmap_client=littlenavmap_client, record_flights=not args.replay)
 
     try:
         if args.cli:
-            asyncio.run(bot.cli_interface())
-        else:
-            bot.run()
+            bot.loop.create_task(bot.cli_interface())
+        bot.run()
     except KeyboardInterrupt:
         print("Bot is shutting down...")
     except Exception as e:
         logging.error(f"Bot crashed: {e}", exc_info=True)
     finally:
-        # Perform any cleanup if necessary
-        pass
\ No newline at end of file
+        bot.flight_recorder.end_flight()
\ No newline at end of file
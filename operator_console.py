@@ -0,0 +1,188 @@
+# File: operator_console.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+from typing import Any, Optional, TextIO
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+# Each refresh pings MongoDB, so keep the live view from spinning
+MIN_REFRESH_INTERVAL = 1.0
+
+HELP_TEXT = """Commands:
+  status                      show bot stats once
+  watch [seconds|off]         live-refresh stats (default every 5 seconds, minimum 1)
+  toggle                      activate/deactivate the bot
+  verbose                     toggle verbose mode
+  personality <text>          set the bot personality
+  textprefix <prefix>         set the text command prefix
+  voiceprefix <prefix>        set the voice command prefix
+  tts voice|speed|volume <v>  update TTS settings
+  clear [user]                clear conversation history for the channel or a user
+  quit                        shut down the bot"""
+
+
+class OperatorConsole:
+    """Non-blocking operator console for a running Bot.
+
+    stdin is read on a daemon thread and handed to the event loop through a
+    queue, so typing (or a slow pipe) never blocks chat processing. Any text
+    stream can be passed as input/output, which keeps the console scriptable
+    with piped stdin.
+    """
+    def __init__(self, bot: Any, channel: str, input_stream: Optional[TextIO] = None,
+                 output: Optional[TextIO] = None, refresh_interval: float = 5.0):
+        self.bot = bot
+        self.channel = channel
+        self.input_stream = input_stream or sys.stdin
+        self.output = output or sys.stdout
+        self.refresh_interval = refresh_interval
+        self.lines: Optional[asyncio.Queue] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        """Process commands until quit or end of input."""
+        loop = asyncio.get_running_loop()
+        self.lines = asyncio.Queue()
+        threading.Thread(target=self._read_input, args=(loop,), daemon=True).start()
+        self.write("Operator console ready. Type 'help' for commands.")
+
+        while True:
+            line = await self.lines.get()
+            if line is None:
+                logger.info("Console input closed.")
+                break
+            command = line.strip()
+            if not command:
+                continue
+            try:
+                if not await self.handle(command):
+                    break
+            except Exception as e:
+                logger.error(f"Error handling console command '{command}': {e}", exc_info=True)
+                self.write(f"Error: {e}")
+        self.stop_watch()
+
+    def _read_input(self, loop: asyncio.AbstractEventLoop) -> None:
+        for line in self.input_stream:
+            loop.call_soon_threadsafe(self.lines.put_nowait, line)
+        loop.call_soon_threadsafe(self.lines.put_nowait, None)
+
+    def write(self, text: str) -> None:
+        self.output.write(text + "\n")
+        self.output.flush()
+
+    async def handle(self, command: str) -> bool:
+        """Execute one console command. Returns False when the console should stop."""
+        name, _, arg = command.partition(' ')
+        name, arg = name.lower(), arg.strip()
+        bot = self.bot
+
+        if name == 'quit':
+            self.write("Shutting down bot...")
+            logger.info("Shutting down bot...")
+            await bot.shutdown()
+            return False
+        elif name == 'help':
+            self.write(HELP_TEXT)
+        elif name in ('status', 'stats'):
+            self.write(await self.render())
+        elif name == 'watch':
+            if arg == 'off':
+                self.stop_watch()
+            elif arg and (not arg.replace('.', '', 1).isdigit() or float(arg) < MIN_REFRESH_INTERVAL):
+                self.write(f"Usage: watch [seconds|off] (at least {MIN_REFRESH_INTERVAL:g} second)")
+            else:
+                self.start_watch(float(arg) if arg else self.refresh_interval)
+        elif name == 'toggle':
+            bot.bot_active = not bot.bot_active
+            self.write(f"Bot {'activated' if bot.bot_active else 'deactivated'}")
+        elif name == 'verbose':
+            bot.verbose = not bot.verbose
+            self.write(f"Verbose mode {'enabled' if bot.verbose else 'disabled'}.")
+        elif name == 'personality' and arg:
+            bot.bot_personality = arg
+            self.write(f"Bot personality changed to: {arg}")
+        elif name == 'textprefix' and arg:
+            bot.text_prefix = arg
+            self.write(f"Text command prefix changed to: {arg}")
+        elif name == 'voiceprefix' and arg:
+            bot.voice_prefix = arg
+            self.write(f"Voice command prefix changed to: {arg}")
+        elif name == 'tts' and len(arg.split()) == 2:
+            setting, value = arg.split()
+            if setting not in ('voice', 'speed', 'volume'):
+                self.write("TTS setting must be one of: voice, speed, volume")
+            else:
+                await bot.handle_tts_command(setting, value)
+                self.write(f"TTS {setting} set to {value}")
+        elif name == 'clear':
+            author = arg.lstrip('@') or None
+            deleted = await bot.conversation_store.clear(self.channel, author)
+            scope = f"for {author}" if author else "for this channel"
+            self.write(f"Conversation history cleared {scope} ({deleted} entries).")
+        else:
+            self.write(f"Invalid command: {command}. Type 'help' for commands.")
+        return True
+
+    def start_watch(self, interval: float) -> None:
+        self.stop_watch()
+        self._watch_task = asyncio.get_running_loop().create_task(self._watch(interval))
+
+    def stop_watch(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self, interval: float) -> None:
+        # Print each refresh below the previous output rather than clearing the
+        # screen, so command output and half-typed input stay visible
+        while True:
+            self.write(await self.render())
+            await asyncio.sleep(interval)
+
+    async def check_dependencies(self) -> None:
+        bot, stats = self.bot, self.bot.stats
+        stats.record_dependency('twitch', bot.twitch_connected())
+        ws = bot.speaker_bot_ws
+        stats.record_dependency('speaker.bot', bool(ws and ws.open), "" if ws else "not connected")
+        try:
+            await asyncio.wait_for(bot.db.command('ping'), timeout=2)
+            stats.record_dependency('mongodb', True)
+        except Exception as e:
+            stats.record_dependency('mongodb', False, str(e) or type(e).__name__)
+
+    async def render(self) -> str:
+        bot, stats = self.bot, self.bot.stats
+        await self.check_dependencies()
+        now = time.monotonic()
+
+        def fmt_latency(value: Optional[float]) -> str:
+            return f"{value * 1000:.0f} ms" if value is not None else "n/a"
+
+        percentiles = stats.latency_percentiles()
+        lines = [
+            f"=== Operator console @ {self.channel} ===",
+            f"Status: {'active' if bot.bot_active else 'inactive'} | verbose: {'on' if bot.verbose else 'off'} "
+            f"| uptime: {int(now - stats.started_at)}s",
+            f"Throughput: {stats.throughput():.1f} msg/min ({stats.messages_total} messages, "
+            f"{stats.replies_total} replies)",
+            "Reply latency (mention to sent): " + ", ".join(f"p{p} {fmt_latency(v)}" for p, v in percentiles.items()),
+            f"Queues: voice commands {bot.voice_command_queue.qsize()}, "
+            f"console input {self.lines.qsize() if self.lines else 0}, "
+            f"event loop tasks {len(asyncio.all_tasks())}",
+            "Dependencies:"
+        ]
+        for name, (healthy, checked_at, detail) in sorted(stats.dependencies.items()):
+            state = "ok" if healthy else "DOWN"
+            suffix = f" - {detail}" if detail else ""
+            lines.append(f"  {name}: {state} ({int(now - checked_at)}s ago){suffix}")
+        lines.append(
+            f"Settings: text prefix '{bot.text_prefix}', voice prefix '{bot.voice_prefix}', "
+            f"TTS {bot.tts_voice} speed {bot.tts_speed} volume {bot.tts_volume}"
+        )
+        lines.append(f"Personality: {bot.bot_personality}")
+        return "\n".join(lines)
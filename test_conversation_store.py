@@ -0,0 +1,251 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+import conversation_store
+from conversation_store import ConversationStore
+
+
+def get_path(doc, path):
+    for key in path.split('.'):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = get_path(doc, key)
+        if isinstance(condition, dict):
+            for op, arg in condition.items():
+                if op == '$type' and arg == 'number':
+                    ok = isinstance(value, (int, float))
+                elif op == '$gt':
+                    ok = value is not None and value > arg
+                elif op == '$gte':
+                    ok = value is not None and value >= arg
+                elif op == '$lte':
+                    ok = value is not None and value <= arg
+                elif op == '$in':
+                    ok = value in arg
+                else:
+                    raise NotImplementedError(op)
+                if not ok:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    """The subset of motor's cursor API ConversationStore uses."""
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return [dict(doc) for doc in self.docs[:length]]
+
+
+class FakeCollection:
+    """In-memory stand-in for a motor collection."""
+    def __init__(self, name):
+        self.name = name
+        self.docs = []
+
+    async def insert_one(self, doc):
+        self.docs.append({'_id': ObjectId(), **doc})
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([doc for doc in self.docs if matches(doc, query or {})])
+
+    async def find_one(self, query, projection=None):
+        found = [doc for doc in self.docs if matches(doc, query)]
+        return dict(found[0]) if found else None
+
+    async def update_one(self, query, update, upsert=False):
+        found = [doc for doc in self.docs if matches(doc, query)]
+        if found:
+            doc = found[0]
+        elif upsert:
+            doc = {'_id': ObjectId(), **query}
+            self.docs.append(doc)
+        else:
+            return
+        doc.update(update.get('$set', {}))
+        for key, amount in update.get('$inc', {}).items():
+            doc[key] = doc.get(key, 0) + amount
+
+    async def update_many(self, query, pipeline):
+        modified = 0
+        for doc in self.docs:
+            if matches(doc, query):
+                for key, value in pipeline[0]['$set'].items():
+                    if value == {'$toDate': '$_id'}:
+                        value = doc['_id'].generation_time
+                    doc[key] = value
+                modified += 1
+        return SimpleNamespace(modified_count=modified)
+
+    async def delete_many(self, query):
+        kept = [doc for doc in self.docs if not matches(doc, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    def aggregate(self, pipeline):
+        docs = list(self.docs)
+        for stage in pipeline:
+            if '$match' in stage:
+                docs = [doc for doc in docs if matches(doc, stage['$match'])]
+            elif '$group' in stage:
+                groups = {}
+                for doc in docs:
+                    key = tuple((name, doc.get(ref[1:])) for name, ref in stage['$group']['_id'].items())
+                    groups[key] = groups.get(key, 0) + 1
+                docs = [{'_id': dict(key), 'count': count} for key, count in groups.items()]
+        return FakeCursor(docs)
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection(name)
+        return self[name]
+
+
+class Summarizer:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    async def __call__(self, previous, exchanges):
+        if self.fail:
+            raise RuntimeError("OpenAI is down")
+        self.batches.append(len(exchanges))
+        return f"{previous or ''}+{len(exchanges)}"
+
+
+def make_store(**kwargs):
+    return ConversationStore(FakeDB(), **kwargs)
+
+
+def seed(store, channel, author, count, start=None):
+    start = start or datetime.now(timezone.utc) - timedelta(hours=1)
+    for i in range(count):
+        store.collection.docs.append({
+            '_id': ObjectId(), 'channel': channel, 'author': author,
+            'user': f"message {i}", 'bot': f"reply {i}", 'timestamp': start + timedelta(seconds=i)
+        })
+
+
+def test_save_and_history_normalize_case():
+    store = make_store()
+
+    async def scenario():
+        await store.save('SomeChannel', 'SomeUser', 'hi', 'hello')
+        await store.save('somechannel', 'someuser', 'again', 'hello again')
+        return await store.get_history('SOMECHANNEL', 'SomeUser')
+
+    history = asyncio.run(scenario())
+    assert [entry['user'] for entry in history] == ['hi', 'again']
+    assert all(isinstance(doc['timestamp'], datetime) for doc in store.collection.docs)
+
+
+def test_clear_scoping():
+    store = make_store()
+    seed(store, 'chan', 'alice', 3)
+    seed(store, 'chan', 'bob', 2)
+    seed(store, 'other', 'alice', 4)
+
+    assert asyncio.run(store.clear('Chan', 'Alice')) == 3
+    assert asyncio.run(store.clear('CHAN')) == 2
+    assert len(store.collection.docs) == 4
+
+
+def test_migrate_legacy():
+    store = make_store()
+    store.collection.docs = [
+        {'_id': ObjectId(), 'user': f"message {i}", 'bot': f"reply {i}", 'timestamp': float(i)}
+        for i in range(3)
+    ]
+    seed(store, 'chan', 'alice', 1)
+
+    assert asyncio.run(store.migrate_legacy('Chan')) == 3
+    legacy = [doc for doc in store.collection.docs if doc['author'] is None]
+    assert len(legacy) == 3
+    assert all(doc['channel'] == 'chan' and isinstance(doc['timestamp'], datetime) for doc in legacy)
+    # Already migrated: nothing left to do
+    assert asyncio.run(store.migrate_legacy('Chan')) == 0
+
+
+def test_compact_keeps_newest_per_user():
+    store = make_store(keep_per_user=20)
+    seed(store, 'chan', 'alice', 25)
+    seed(store, 'chan', 'bob', 10)
+    summarize = Summarizer()
+
+    assert asyncio.run(store.compact(summarize)) == 5
+    remaining = sorted(doc['user'] for doc in store.collection.docs if doc['author'] == 'alice')
+    assert remaining == sorted(f"message {i}" for i in range(5, 25))
+    assert asyncio.run(store.get_summary('chan', 'alice')) == '+5'
+    assert asyncio.run(store.get_summary('chan', 'bob')) is None
+
+
+def test_compact_batches_channel_history():
+    store = make_store()
+    seed(store, 'chan', None, 120)
+    summarize = Summarizer()
+
+    assert asyncio.run(store.compact(summarize)) == 120
+    assert summarize.batches == [50, 50, 20]
+    assert store.collection.docs == []
+    assert asyncio.run(store.get_summary('chan', None)) == '+50+50+20'
+
+
+def test_compact_caps_channel_history(monkeypatch):
+    monkeypatch.setattr(conversation_store, 'CHANNEL_SUMMARY_LIMIT', 60)
+    store = make_store()
+    seed(store, 'chan', None, 200)
+    summarize = Summarizer()
+
+    assert asyncio.run(store.compact(summarize)) == 60
+    assert summarize.batches == [50, 10]
+    assert store.collection.docs == []
+
+
+def test_compact_skips_expired_exchanges():
+    store = make_store(ttl_days=30)
+    seed(store, 'chan', None, 100, start=datetime.now(timezone.utc) - timedelta(days=60))
+    seed(store, 'chan', None, 10)
+    summarize = Summarizer()
+
+    assert asyncio.run(store.compact(summarize)) == 10
+    # Expired exchanges are left for the TTL index
+    assert len(store.collection.docs) == 100
+
+
+def test_failed_summary_keeps_exchanges():
+    store = make_store(keep_per_user=2)
+    seed(store, 'chan', 'alice', 5)
+
+    assert asyncio.run(store.compact(Summarizer(fail=True))) == 0
+    assert len(store.collection.docs) == 5
+    assert store.summaries.docs == []
@@ -0,0 +1,108 @@
+import asyncio
+import struct
+
+import pytest
+
+from flight_recorder import (
+    FlightRecorder, FlightRecording, ReplayClient, HEADER_FORMAT, MAGIC, SAMPLE_SIZE
+)
+
+
+def sim_info(i, on_ground=False):
+    return {
+        'active': True,
+        'position': {'lat': 50.0 + i * 0.01, 'lon': 0.0},
+        'indicated_altitude': 5000.0 - i * 50,
+        'ground_speed': 120.0,
+        'vertical_speed': -300.0 - i,
+        'heading': 180.0,
+        'on_ground': on_ground
+    }
+
+
+def record_flight(recorder, samples=100, touchdown=90, start=1000.0):
+    for i in range(samples):
+        recorder.record(sim_info(i, on_ground=i >= touchdown), now=start + i)
+    recorder.end_flight()
+    return recorder.current_path
+
+
+def test_round_trip_summary(tmp_path):
+    path = record_flight(FlightRecorder(str(tmp_path)))
+    with FlightRecording(path) as recording:
+        stats = recording.summary()
+    assert stats['samples'] == 100
+    assert stats['duration'] == 99.0
+    assert stats['max_altitude'] == 5000.0
+    # One hundredth of a degree of latitude is 0.6 nm
+    assert stats['total_distance'] == pytest.approx(99 * 0.6, rel=1e-3)
+    # Vertical speed of the last airborne sample before touchdown
+    assert stats['landing_vertical_speed'] == -389.0
+
+
+def test_failed_poll_does_not_split_flight(tmp_path):
+    recorder = FlightRecorder(str(tmp_path))
+    recorder.record(sim_info(0), now=1000.0)
+    recorder.record(None, now=1001.0)
+    recorder.record(sim_info(2), now=1002.0)
+    recorder.end_flight()
+    assert len(recorder.list_recordings()) == 1
+
+
+def test_inactive_sim_and_gap_split_flights(tmp_path):
+    recorder = FlightRecorder(str(tmp_path), max_gap=60)
+    recorder.record(sim_info(0), now=1000.0)
+    recorder.record({'active': False}, now=1001.0)
+    recorder.record(sim_info(0), now=2000.0)
+    recorder.record(sim_info(1), now=2100.0)
+    recorder.end_flight()
+    assert len(recorder.list_recordings()) == 3
+
+
+def test_same_second_flights_do_not_overwrite(tmp_path):
+    recorder = FlightRecorder(str(tmp_path))
+    first = record_flight(recorder, samples=10, start=1000.0)
+    second = record_flight(recorder, samples=1, start=1000.0)
+    assert first != second
+    with FlightRecording(first) as recording:
+        assert len(recording) == 10
+
+
+def test_partial_trailing_sample_is_ignored(tmp_path):
+    path = record_flight(FlightRecorder(str(tmp_path)), samples=5)
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * (SAMPLE_SIZE // 2))
+    with FlightRecording(path) as recording:
+        assert len(recording) == 5
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'FLT',
+    struct.pack(HEADER_FORMAT, b'NOPE', 1, SAMPLE_SIZE, 0.0),
+    struct.pack(HEADER_FORMAT, MAGIC, 99, SAMPLE_SIZE, 0.0),
+])
+def test_bad_header_raises_value_error(tmp_path, content):
+    path = tmp_path / 'bad.flr'
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        FlightRecording(str(path))
+
+
+def test_replay_step_mode(tmp_path):
+    path = record_flight(FlightRecorder(str(tmp_path)), samples=10, touchdown=8)
+
+    async def replay():
+        client = ReplayClient(path, speed=0)
+        samples = []
+        while True:
+            info = await client.get_sim_info()
+            if info is None:
+                return samples
+            samples.append(info)
+
+    samples = asyncio.run(replay())
+    assert len(samples) == 10
+    assert samples[0]['position'] == {'lat': 50.0, 'lon': 0.0}
+    assert samples[-1]['on_ground'] is True
+    assert all(info['active'] for info in samples)
@@ -0,0 +1,108 @@
+import asyncio
+import io
+import queue
+
+from bot_stats import BotStats
+from operator_console import OperatorConsole
+
+
+class StubDB:
+    async def command(self, name):
+        return {'ok': 1}
+
+
+class StubStore:
+    def __init__(self):
+        self.cleared = []
+
+    async def clear(self, channel, author=None):
+        self.cleared.append((channel, author))
+        return 3
+
+
+class StubBot:
+    def __init__(self):
+        self.stats = BotStats()
+        self.db = StubDB()
+        self.conversation_store = StubStore()
+        self.speaker_bot_ws = None
+        self.voice_command_queue = queue.Queue()
+        self.bot_active = True
+        self.verbose = False
+        self.bot_personality = "You are a helpful Twitch chat assistant."
+        self.text_prefix = "!"
+        self.voice_prefix = "hey bot"
+        self.tts_voice = "default"
+        self.tts_speed = 1.2
+        self.tts_volume = 1.0
+        self.shut_down = False
+        self.connected = True
+
+    def twitch_connected(self):
+        return self.connected
+
+    async def handle_tts_command(self, setting, value):
+        setattr(self, f"tts_{setting}", value)
+
+    async def shutdown(self):
+        self.shut_down = True
+
+
+def run_console(bot, commands):
+    output = io.StringIO()
+    console = OperatorConsole(bot, 'somechannel', input_stream=io.StringIO(commands), output=output)
+    asyncio.run(asyncio.wait_for(console.run(), timeout=5))
+    return output.getvalue()
+
+
+def test_settings_and_quit():
+    bot = StubBot()
+    output = run_console(bot, (
+        "personality You are a pirate\n"
+        "textprefix ?\n"
+        "voiceprefix ok bot\n"
+        "verbose\n"
+        "toggle\n"
+        "tts speed 1.5\n"
+        "clear @SomeUser\n"
+        "quit\n"
+        "toggle\n"
+    ))
+    assert bot.bot_personality == "You are a pirate"
+    assert bot.text_prefix == "?"
+    assert bot.voice_prefix == "ok bot"
+    assert bot.verbose is True
+    assert bot.tts_speed == "1.5"
+    assert bot.conversation_store.cleared == [('somechannel', 'SomeUser')]
+    assert bot.shut_down
+    # Commands after quit are not processed
+    assert bot.bot_active is False
+    assert "Shutting down bot..." in output
+
+
+def test_status_renders_stats():
+    bot = StubBot()
+    bot.stats.record_message()
+    for latency in (0.1, 0.2, 0.3):
+        bot.stats.record_reply(latency)
+    output = run_console(bot, "status\n")
+    assert "1 messages, 3 replies" in output
+    assert "p50 200 ms" in output
+    assert "mongodb: ok" in output
+    assert "speaker.bot: DOWN" in output
+    assert "twitch: ok" in output
+
+
+def test_twitch_disconnect_is_reported():
+    bot = StubBot()
+    bot.connected = False
+    output = run_console(bot, "status\n")
+    assert "twitch: DOWN" in output
+
+
+def test_invalid_commands_and_end_of_input():
+    bot = StubBot()
+    output = run_console(bot, "bogus\nwatch 0\nwatch abc\n")
+    assert "Invalid command: bogus" in output
+    assert output.count("Usage: watch") == 2
+    assert not bot.shut_down